@@ -1,11 +1,14 @@
 #!/usr/bin/env python3
 
 import click
-import json
+import orjson
+import pyarrow as pa
+import pyarrow.json as paj
 from datetime import datetime
-from reddit_fetcher import RedditFetcher
+from reddit_fetcher import RedditFetcher, AsyncRedditFetcher, MAX_COMMENT_CHARS
 from openai_analyzer import OpenAIAnalyzer
 import pandas as pd
+import numpy as np
 import os
 from dotenv import load_dotenv
 
@@ -33,14 +36,74 @@ def validate_environment():
         exit(1)
 
 
+# Explicit types for the fields the fetchers produce. Without them pyarrow turns
+# timestamp-like strings (created_date, or a title such as "2023-01-01") into datetimes
+COMMENT_SCHEMA = pa.struct([
+    ('id', pa.string()),
+    ('author', pa.string()),
+    ('body', pa.string()),
+    ('score', pa.int64()),
+    ('created_utc', pa.float64()),
+    ('created_date', pa.string()),
+    ('parent_id', pa.string()),
+    ('is_submitter', pa.bool_()),
+])
+
+POST_SCHEMA = pa.schema([
+    ('id', pa.string()),
+    ('title', pa.string()),
+    ('author', pa.string()),
+    ('created_utc', pa.float64()),
+    ('created_date', pa.string()),
+    ('score', pa.int64()),
+    ('num_comments', pa.int64()),
+    ('selftext', pa.string()),
+    ('url', pa.string()),
+    ('permalink', pa.string()),
+    ('is_self', pa.bool_()),
+    ('comments', pa.list_(COMMENT_SCHEMA)),
+])
+
+
+def save_posts(posts, filename):
+    """Write posts as line-delimited JSON, one post per line."""
+    with open(filename, 'wb') as f:
+        for post in posts:
+            f.write(orjson.dumps(post))
+            f.write(b"\n")
+
+
+def load_posts(filename):
+    """Load posts from a JSONL file, or from a legacy JSON array file."""
+    # pyarrow parses line-delimited JSON in parallel blocks across all cores
+    try:
+        read_options = paj.ReadOptions(use_threads=True, block_size=8 << 20)
+        parse_options = paj.ParseOptions(explicit_schema=POST_SCHEMA, unexpected_field_behavior="error")
+        return paj.read_json(filename, read_options=read_options, parse_options=parse_options).to_pylist()
+    except pa.ArrowInvalid:
+        pass  # Not NDJSON, or rows that don't match POST_SCHEMA
+    
+    with open(filename, 'rb') as f:
+        if f.read(1) == b"[":
+            f.seek(0)
+            return orjson.loads(f.read())
+        
+        f.seek(0)
+        return [orjson.loads(line) for line in f if line.strip()]
+
+
 @click.command()
 @click.option('--lookback', '-l', default=30, help='Number of days to look back (default: 30)')
 @click.option('--post-limit', '-p', default=None, type=int, help='Maximum number of posts to fetch (default: all)')
 @click.option('--comments-per-post', '-c', default=50, help='Maximum comments per post (default: 50)')
-@click.option('--save-raw', '-s', is_flag=True, help='Save raw Reddit data to JSON file')
-@click.option('--load-from-file', '-f', type=str, help='Load Reddit data from existing JSON file instead of fetching')
+@click.option('--save-raw', '-s', is_flag=True, help='Save raw Reddit data to JSONL file')
+@click.option('--keep-full-bodies', is_flag=True, help=f'Keep full comment bodies instead of the first {MAX_COMMENT_CHARS} characters')
+@click.option('--async-fetch', '-a', is_flag=True, help='Fetch from Reddit with concurrent aiohttp requests instead of PRAW')
+@click.option('--load-from-file', '-f', type=str, help='Load Reddit data from existing JSONL (or JSON) file instead of fetching')
+@click.option('--batch-api', '-b', is_flag=True, help='Use the OpenAI Batch API (50% cheaper, results may take up to 24h)')
+@click.option('--no-cache', is_flag=True, help='Always call the APIs instead of reusing cached responses from .cache/')
 @click.option('--output', '-o', default='recruitment_problems_report', help='Output filename prefix (default: recruitment_problems_report)')
-def main(lookback, post_limit, comments_per_post, save_raw, load_from_file, output):
+def main(lookback, post_limit, comments_per_post, save_raw, keep_full_bodies, async_fetch, load_from_file, batch_api, no_cache, output):
     """
     Fetch posts from r/recruitinghell and analyze recruitment problems using GPT.
     
@@ -52,7 +115,10 @@ def main(lookback, post_limit, comments_per_post, save_raw, load_from_file, outp
         python main.py --lookback 30 --post-limit 100 --save-raw
         
         # Analyze from previously saved data
-        python main.py --load-from-file reddit_data_2024-01-15.json
+        python main.py --load-from-file reddit_data_2024-01-15.jsonl
+        
+        # Analyze at half the cost through the Batch API
+        python main.py --lookback 30 --batch-api
     """
     print("🔍 Reddit Recruitment Hell Analyzer")
     print("=" * 50)
@@ -64,19 +130,23 @@ def main(lookback, post_limit, comments_per_post, save_raw, load_from_file, outp
     if load_from_file:
         print(f"Loading Reddit data from {load_from_file}...")
         try:
-            with open(load_from_file, 'r', encoding='utf-8') as f:
-                posts = json.load(f)
+            posts = load_posts(load_from_file)
             print(f"Loaded {len(posts)} posts from file")
         except FileNotFoundError:
             print(f"Error: File {load_from_file} not found")
             exit(1)
-        except json.JSONDecodeError:
+        except orjson.JSONDecodeError:
             print(f"Error: Invalid JSON in {load_from_file}")
             exit(1)
     else:
         # Fetch from Reddit
         print(f"Fetching posts from last {lookback} days...")
-        fetcher = RedditFetcher()
+        max_comment_chars = None if keep_full_bodies else MAX_COMMENT_CHARS
+        if async_fetch:
+            fetcher = AsyncRedditFetcher(max_comment_chars=max_comment_chars)
+        else:
+            fetcher = RedditFetcher(cache_path=None if no_cache else ".cache/reddit.db",
+                                    max_comment_chars=max_comment_chars)
         
         try:
             posts = fetcher.fetch_all_content(
@@ -92,9 +162,8 @@ def main(lookback, post_limit, comments_per_post, save_raw, load_from_file, outp
         # Optionally save raw data
         if save_raw and posts:
             timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M")
-            raw_filename = f"reddit_data_{timestamp}.json"
-            with open(raw_filename, 'w', encoding='utf-8') as f:
-                json.dump(posts, f, indent=2, ensure_ascii=False)
+            raw_filename = f"reddit_data_{timestamp}.jsonl"
+            save_posts(posts, raw_filename)
             print(f"Raw Reddit data saved to {raw_filename}")
     
     if not posts:
@@ -104,22 +173,25 @@ def main(lookback, post_limit, comments_per_post, save_raw, load_from_file, outp
     # Display summary statistics
     print("\n📊 Data Summary:")
     print(f"  Total posts: {len(posts)}")
-    total_comments = sum(len(post['comments']) for post in posts)
+    # Pull the numeric columns out once and reduce them in NumPy
+    timestamps = np.fromiter((post['created_utc'] for post in posts), dtype=np.float64, count=len(posts))
+    comment_counts = np.fromiter((len(post['comments']) for post in posts), dtype=np.int64, count=len(posts))
+    
+    total_comments = int(comment_counts.sum())
     print(f"  Total comments: {total_comments}")
     
     # Calculate date range
-    timestamps = [post['created_utc'] for post in posts]
-    if timestamps:
-        oldest = datetime.fromtimestamp(min(timestamps))
-        newest = datetime.fromtimestamp(max(timestamps))
+    if timestamps.size:
+        oldest = datetime.fromtimestamp(timestamps.min())
+        newest = datetime.fromtimestamp(timestamps.max())
         print(f"  Date range: {oldest.strftime('%Y-%m-%d')} to {newest.strftime('%Y-%m-%d')}")
     
     # Step 2: Analyze with OpenAI
     print("\n🤖 Analyzing recruitment problems with GPT...")
-    analyzer = OpenAIAnalyzer()
+    analyzer = OpenAIAnalyzer(cache_dir=None if no_cache else ".cache/openai")
     
     try:
-        analysis = analyzer.analyze_recruitment_problems(posts)
+        analysis = analyzer.analyze_recruitment_problems(posts, use_batch_api=batch_api)
         
         # Save results
         output_json = f"{output}.json"
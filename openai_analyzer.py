@@ -1,24 +1,114 @@
 import openai
-from typing import List, Dict
+import asyncio
+import tiktoken
+import hashlib
+import re
+from collections import Counter
+from pathlib import Path
+from typing import List, Dict, Optional
 import json
+import time
 from tqdm import tqdm
 import os
 from dotenv import load_dotenv
+from rate_limiter import TokenBucket, log_retry
+from tenacity import retry, wait_exponential_jitter, stop_after_attempt, retry_if_exception_type
 
 load_dotenv()
 
+# Kept byte-identical across every batch request: OpenAI caches prompt prefixes of
+# 1024+ tokens automatically, so only the per-batch posts in the user message are
+# billed at the full input rate once the first request has warmed the cache.
+ANALYSIS_SYSTEM_PROMPT = """You are an expert at analyzing recruitment and hiring practices. Extract specific, actionable problems from Reddit posts.
+
+The user message contains a numbered batch of posts from r/recruitinghell, a community where job seekers describe bad experiences with employers, recruiters, job boards and hiring processes. Posts are separated by "---". Each post starts with its number in square brackets followed by "POST:" (the title), may contain "BODY:" (the post text) and may contain "TOP COMMENTS:" (replies from other users, truncated).
+
+Analyze each post separately and identify the recruitment problems it complains about.
+
+For each problem identified, provide:
+1. title: Problem title (short, descriptive, at most eight words)
+2. description: Description (2-3 sentences) explaining what happens and why it hurts candidates
+3. examples: A list of 1-3 short example quotes or situations taken from the post or its comments
+
+Guidelines:
+- Focus on concrete, specific problems rather than general complaints. "Company asked for 12 hours of unpaid take-home work before the first interview" is a problem; "hiring is broken" is not.
+- Describe the problem, not the individual post. A post may contain several problems; list each once.
+- Use the comments as evidence. When commenters describe the same problem, add their words to its examples.
+- Name problems consistently across posts, using plain terms a job seeker would recognise, such as "Ghost job postings", "Ghosting after final interview", "Lowball salary offers", "Excessive interview rounds", "Unpaid take-home assignments", "Automated rejection without review", "Bait-and-switch job descriptions", "Unrealistic experience requirements", "Recruiter spam and misrepresentation", "Discriminatory screening questions", "Hidden salary ranges" or "Rescinded job offers". Use exactly the same title whenever two posts share a problem.
+- Ignore memes, jokes, rants without a recruitment-specific problem, success stories and moderator announcements; give those posts an empty list.
+- Quote examples verbatim where possible and keep each under 30 words. Never include usernames, email addresses, phone numbers or other personal details.
+
+Respond with a single JSON object that maps every post number, as a string, to the list of problems found in that post, and nothing else.
+
+Example 1
+
+Content:
+[1] POST: Final round, then silence for 6 weeks
+BODY: Five interviews including a panel and a presentation. Recruiter said I'd hear back by Friday. That was six weeks ago and my emails go unanswered.
+TOP COMMENTS:
+- Same thing happened to me at a bank, four rounds then nothing at all...
+- Ghosting after the final round should be illegal honestly...
+---
+[2] POST: Applied to a job that has been "urgently hiring" since 2022
+BODY: Same posting gets reposted every month. I know three people who applied and none got a response.
+
+Response:
+{"1": [{"title": "Ghosting after final interview", "description": "Candidates complete long multi-stage processes and then never hear back, even after following up. This leaves them unable to plan and signals a lack of respect for their time.", "examples": ["Recruiter said I'd hear back by Friday. That was six weeks ago", "four rounds then nothing at all"]}, {"title": "Excessive interview rounds", "description": "Employers require many interview stages, panels and presentations for a single role. Each round costs candidates time off work and preparation.", "examples": ["Five interviews including a panel and a presentation"]}], "2": [{"title": "Ghost job postings", "description": "Listings stay open or are reposted for months or years with no real intent to hire. Applicants invest effort in roles that do not exist.", "examples": ["Same posting gets reposted every month"]}]}
+
+Example 2
+
+Content:
+[1] POST: Entry level role wants 5 years of experience and pays 40k
+BODY: Junior data analyst. Requirements: 5+ years SQL, Python, Tableau, a master's degree. Salary 40k in a high cost of living city.
+TOP COMMENTS:
+- Entry level now means you did the job somewhere else already...
+---
+[2] POST: Finally got an offer after 8 months!
+BODY: Just wanted to share some good news, thanks everyone for the support.
+---
+[3] POST: They asked for my salary expectations before telling me the range
+BODY: I said 85k, they said great. Found out later the budget was 110k.
+
+Response:
+{"1": [{"title": "Unrealistic experience requirements", "description": "Roles advertised as entry level or junior demand years of experience and advanced qualifications. This locks out the candidates the role is supposedly meant for.", "examples": ["Junior data analyst. Requirements: 5+ years SQL, Python, Tableau, a master's degree", "Entry level now means you did the job somewhere else already"]}, {"title": "Lowball salary offers", "description": "Pay is far below the market rate for the required skills and location. Candidates are expected to accept it because of a tough job market.", "examples": ["Salary 40k in a high cost of living city"]}], "2": [], "3": [{"title": "Hidden salary ranges", "description": "Employers ask candidates for salary expectations while withholding the budgeted range. Candidates who guess low end up underpaid.", "examples": ["I said 85k, they said great. Found out later the budget was 110k"]}]}"""
+
+
+# Back off and retry transient API failures instead of dropping the whole batch
+openai_retry = retry(
+    wait=wait_exponential_jitter(1, 30),
+    stop=stop_after_attempt(6),
+    retry=retry_if_exception_type((openai.RateLimitError, openai.APIConnectionError, openai.InternalServerError)),
+    before_sleep=log_retry,
+    reraise=True
+)
+
 
 class OpenAIAnalyzer:
-    def __init__(self):
-        self.client = openai.OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    def __init__(self, max_concurrency: int = 8, requests_per_minute: int = 50,
+                 cache_dir: Optional[str] = ".cache/openai"):
+        # Retries are handled by openai_retry so they can be logged and share one backoff policy
+        self.client = openai.OpenAI(api_key=os.getenv("OPENAI_API_KEY"), max_retries=0)
+        self.async_client = openai.AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"), max_retries=0)
+        self.max_concurrency = max_concurrency
+        self.requests_per_minute = requests_per_minute
+        self._rate_limiter = None
+        self.encoding = tiktoken.encoding_for_model("gpt-4o-mini")
+        self.prompt_tokens = 0
+        self.cached_prompt_tokens = 0
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        if self.cache_dir:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
         
-    def analyze_recruitment_problems(self, posts: List[Dict], batch_size: int = 10) -> Dict:
+    def analyze_recruitment_problems(self, posts: List[Dict], batch_size: int = 25,
+                                     use_batch_api: bool = False) -> Dict:
         """
         Analyze posts and comments to identify top recruitment problems.
         
         Args:
             posts: List of post dictionaries with comments
             batch_size: Number of posts to analyze in each batch
+            use_batch_api: Submit all batches as a single OpenAI Batch API job
+                (half the token price, but results can take up to 24h)
         
         Returns:
             Dictionary with analysis results
@@ -28,25 +118,130 @@ class OpenAIAnalyzer:
         # Process posts in batches to manage token limits
         all_problems = []
         
-        for i in tqdm(range(0, len(posts), batch_size), desc="Analyzing batches"):
-            batch = posts[i:i + batch_size]
-            batch_analysis = self._analyze_batch(batch)
-            if batch_analysis:
+        if use_batch_api:
+            all_problems = self._submit_batch_job(posts, batch_size)
+        else:
+            batches = [posts[i:i + batch_size] for i in range(0, len(posts), batch_size)]
+            for batch_analysis in asyncio.run(self._run_all(batches)):
                 all_problems.extend(batch_analysis)
+            
+            if self.prompt_tokens:
+                print(f"Prompt cache: {self.cached_prompt_tokens}/{self.prompt_tokens} input tokens served from cache")
         
         # Get final summary of all problems
         final_analysis = self._summarize_problems(all_problems)
         
         return final_analysis
     
-    def _prepare_content_for_analysis(self, posts: List[Dict]) -> str:
-        """Prepare post content for GPT analysis."""
+    def _cache_path(self, messages: List[Dict], **kwargs) -> Optional[Path]:
+        """Return the cache file for a chat request, keyed by a hash of all its parameters."""
+        if not self.cache_dir:
+            return None
+        
+        key = hashlib.sha256(json.dumps([kwargs, messages], sort_keys=True).encode("utf-8")).hexdigest()
+        return self.cache_dir / f"{key}.json"
+    
+    def _read_cache(self, path: Optional[Path]) -> Optional[str]:
+        """Return the cached response content, or None on a miss."""
+        if not path or not path.exists():
+            return None
+        
+        try:
+            return json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            # A truncated or corrupt entry counts as a miss and is rewritten on the next call
+            path.unlink(missing_ok=True)
+            return None
+    
+    def _write_cache(self, path: Optional[Path], content: str):
+        """Store response content so identical requests skip the API."""
+        if path:
+            # Write to a temporary file and swap it in so an interrupted run never leaves a partial entry
+            tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+            tmp_path.write_text(json.dumps(content), encoding="utf-8")
+            os.replace(tmp_path, path)
+    
+    def _is_cacheable(self, content: Optional[str], finish_reason: Optional[str], **kwargs) -> bool:
+        """Only cache complete replies, and for JSON requests only ones that parse."""
+        if finish_reason != "stop" or content is None:
+            return False
+        
+        if (kwargs.get("response_format") or {}).get("type") == "json_object":
+            try:
+                json.loads(content)
+            except json.JSONDecodeError:
+                return False
+        return True
+    
+    def _record_usage(self, usage):
+        """Track how many input tokens hit OpenAI's automatic prompt cache."""
+        if not usage:
+            return
+        
+        self.prompt_tokens += usage.prompt_tokens
+        details = getattr(usage, "prompt_tokens_details", None)
+        if details and details.cached_tokens:
+            self.cached_prompt_tokens += details.cached_tokens
+    
+    @openai_retry
+    def _cached_chat(self, messages: List[Dict], **kwargs) -> str:
+        """Run a chat completion, serving identical requests from the disk cache."""
+        path = self._cache_path(messages, **kwargs)
+        cached = self._read_cache(path)
+        if cached is not None:
+            return cached
+        
+        response = self.client.chat.completions.create(messages=messages, **kwargs)
+        self._record_usage(response.usage)
+        choice = response.choices[0]
+        content = choice.message.content
+        # A truncated or malformed reply would otherwise fail the same way on every rerun
+        if self._is_cacheable(content, choice.finish_reason, **kwargs):
+            self._write_cache(path, content)
+        return content
+    
+    @openai_retry
+    async def _cached_chat_async(self, messages: List[Dict], **kwargs) -> str:
+        """Async variant of _cached_chat using the AsyncOpenAI client."""
+        path = self._cache_path(messages, **kwargs)
+        cached = self._read_cache(path)
+        if cached is not None:
+            return cached
+        
+        if self._rate_limiter:
+            await self._rate_limiter.acquire()
+        response = await self.async_client.chat.completions.create(messages=messages, **kwargs)
+        self._record_usage(response.usage)
+        choice = response.choices[0]
+        content = choice.message.content
+        # A truncated or malformed reply would otherwise fail the same way on every rerun
+        if self._is_cacheable(content, choice.finish_reason, **kwargs):
+            self._write_cache(path, content)
+        return content
+    
+    def _prepare_content_for_analysis(self, posts: List[Dict], token_budget: int = 12000,
+                                      post_token_budget: int = 450) -> str:
+        """
+        Prepare numbered post content for GPT analysis.
+        
+        Each post is capped at post_token_budget tokens, with the body limited to about
+        two thirds of that so the top comments always fit, and posts stop being added
+        once token_budget tokens are used.
+        """
         content_parts = []
+        used_tokens = 0
+        separator = "\n---\n"
+        separator_tokens = len(self.encoding.encode(separator))
+        body_token_budget = post_token_budget * 2 // 3
         
-        for post in posts:
-            post_content = f"POST: {post['title']}\n"
+        for number, post in enumerate(posts, 1):
+            post_content = f"[{number}] POST: {post['title']}\n"
             if post['selftext']:
-                post_content += f"BODY: {post['selftext']}\n"
+                body = post['selftext'][:body_token_budget * 16]
+                body_tokens = self.encoding.encode(body)
+                if len(body_tokens) > body_token_budget:
+                    body = self.encoding.decode(body_tokens[:body_token_budget])
+                post_content += f"BODY: {body}\n"
             
             # Add top comments
             if post['comments']:
@@ -54,57 +249,242 @@ class OpenAIAnalyzer:
                 for comment in post['comments'][:5]:  # Top 5 comments
                     post_content += f"- {comment['body'][:200]}...\n"
             
+            separator_cost = separator_tokens if content_parts else 0
+            remaining = token_budget - used_tokens - separator_cost
+            if remaining <= 0:
+                break
+            
+            # Slice before encoding so a huge post body is never copied or tokenized
+            # in full; tokens average ~4 characters, so 16 per token leaves plenty of slack
+            limit = min(remaining, post_token_budget)
+            text = post_content[:limit * 16]
+            tokens = self.encoding.encode(text)
+            if len(tokens) > limit or len(text) < len(post_content):
+                # Cut the post at a token boundary
+                tokens = tokens[:limit]
+                post_content = self.encoding.decode(tokens)
+            
             content_parts.append(post_content)
+            used_tokens += separator_cost + len(tokens)
         
-        return "\n---\n".join(content_parts)
+        return separator.join(content_parts)
     
-    def _analyze_batch(self, posts: List[Dict]) -> List[Dict]:
-        """Analyze a batch of posts."""
+    def _batch_request(self, posts: List[Dict]) -> Dict:
+        """Build the chat completion parameters for analyzing a batch of posts."""
         content = self._prepare_content_for_analysis(posts)
         
-        prompt = """Analyze these Reddit posts from r/recruitinghell and identify the main recruitment problems people are complaining about.
-
-For each problem identified, provide:
-1. Problem title (short, descriptive)
-2. Description (2-3 sentences)
-3. Frequency (how often it appears)
-4. Example quotes or situations
-
-Focus on concrete, specific problems rather than general complaints.
-
-Content to analyze:
-{content}
-
-Return your analysis as a JSON array of problems.""".format(content=content[:8000])  # Limit content length
+        return {
+            "model": "gpt-4o-mini",
+            "messages": [
+                {"role": "system", "content": ANALYSIS_SYSTEM_PROMPT},
+                {"role": "user", "content": content}
+            ],
+            "temperature": 0.3,
+            "response_format": {"type": "json_object"}
+        }
+    
+    async def _run_all(self, batches: List[List[Dict]]) -> List[List[Dict]]:
+        """Analyze all batches concurrently, at most max_concurrency at a time."""
+        sem = asyncio.Semaphore(self.max_concurrency)
+        # The semaphore caps requests in flight; the bucket keeps us under the RPM limit
+        self._rate_limiter = TokenBucket.per_minute(self.requests_per_minute, capacity=self.max_concurrency)
         
+        with tqdm(total=len(batches), desc="Analyzing batches") as progress:
+            async def _bounded(batch: List[Dict]) -> List[Dict]:
+                # The request must start inside the semaphore, not just be awaited there
+                async with sem:
+                    result = await self._analyze_batch_async(batch)
+                progress.update(1)
+                return result
+            
+            if not batches:
+                return []
+            
+            # Send the first batch alone so the shared system prompt is in OpenAI's
+            # prompt cache before the remaining requests fan out
+            first = await _bounded(batches[0])
+            rest = await asyncio.gather(*[_bounded(batch) for batch in batches[1:]])
+            return [first] + rest
+    
+    async def _analyze_batch_async(self, posts: List[Dict]) -> List[Dict]:
+        """Analyze a batch of posts."""
         try:
-            response = self.client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[
-                    {"role": "system", "content": "You are an expert at analyzing recruitment and hiring practices. Extract specific, actionable problems from Reddit posts."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.3,
-                response_format={"type": "json_object"}
-            )
+            content = await self._cached_chat_async(**self._batch_request(posts))
             
-            result = json.loads(response.choices[0].message.content)
-            return result.get('problems', [])
+            return self._parse_batch_response(content, posts)
             
         except Exception as e:
             print(f"Error analyzing batch: {e}")
             return []
     
+    def _parse_batch_response(self, content: str, posts: List[Dict]) -> List[Dict]:
+        """Flatten a {"<post number>": [problems]} response, tagging each problem with its post id."""
+        problems = []
+        
+        for number, post_problems in json.loads(content).items():
+            if not isinstance(post_problems, list):
+                continue
+            
+            index = int(number) - 1 if str(number).isdigit() else -1
+            post_id = posts[index]['id'] if 0 <= index < len(posts) else None
+            for problem in post_problems:
+                if isinstance(problem, dict):
+                    problems.append({**problem, 'post_id': post_id})
+        
+        return problems
+    
+    def _submit_batch_job(self, posts: List[Dict], batch_size: int = 25,
+                          poll_interval: int = 30) -> List[Dict]:
+        """
+        Analyze all batches through a single OpenAI Batch API job.
+        
+        Args:
+            posts: List of post dictionaries with comments
+            batch_size: Number of posts per chat completion request
+            poll_interval: Seconds to wait between job status checks
+        
+        Returns:
+            Flat list of problems from every completed request
+        """
+        results = {}
+        batches = {}
+        requests = {}
+        cache_paths = {}
+        lines = []
+        for i in range(0, len(posts), batch_size):
+            custom_id = f"batch-{i // batch_size}"
+            batches[custom_id] = posts[i:i + batch_size]
+            request = requests[custom_id] = self._batch_request(batches[custom_id])
+            
+            cache_paths[custom_id] = self._cache_path(**request)
+            cached = self._read_cache(cache_paths[custom_id])
+            if cached is not None:
+                results[custom_id] = self._parse_batch_response(cached, batches[custom_id])
+                continue
+            
+            lines.append(json.dumps({
+                "custom_id": custom_id,
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": request
+            }))
+        
+        if not lines:
+            print("All batches served from cache")
+            return self._ordered_problems(results)
+        
+        print(f"Submitting {len(lines)} requests to the OpenAI Batch API ({len(results)} cached)...")
+        
+        job = None
+        try:
+            # The sync client has SDK retries disabled, so every Batch API call goes
+            # through openai_retry; one transient error must not abandon a paid job
+            input_file = openai_retry(self.client.files.create)(
+                file=("batch_input.jsonl", "\n".join(lines).encode("utf-8")),
+                purpose="batch"
+            )
+            job = openai_retry(self.client.batches.create)(
+                input_file_id=input_file.id,
+                endpoint="/v1/chat/completions",
+                completion_window="24h"
+            )
+            
+            while job.status not in ("completed", "failed", "expired", "cancelled"):
+                counts = job.request_counts
+                done = f" ({counts.completed}/{counts.total} done)" if counts else ""
+                print(f"Batch job {job.id} is {job.status}{done}, checking again in {poll_interval}s...")
+                time.sleep(poll_interval)
+                job = openai_retry(self.client.batches.retrieve)(job.id)
+            
+            if job.status == "failed" and job.errors and job.errors.data:
+                for error in job.errors.data:
+                    where = f" (input line {error.line})" if error.line is not None else ""
+                    print(f"Batch job {job.id} failed{where}: {error.code}: {error.message}")
+            
+            # Expired jobs still return the requests that finished in time; requests
+            # that failed are listed in a separate error file
+            if job.error_file_id:
+                errors = openai_retry(self.client.files.content)(job.error_file_id).text
+                self._report_batch_errors(errors)
+            
+            if not job.output_file_id:
+                print(f"Batch job {job.id} ended with status '{job.status}' and no successful output")
+                return self._ordered_problems(results)
+            
+            output = openai_retry(self.client.files.content)(job.output_file_id).text
+            
+        except Exception as e:
+            if job:
+                print(f"Error running batch job {job.id} (retrieve it later with client.batches.retrieve): {e}")
+            else:
+                print(f"Error submitting batch job: {e}")
+            return self._ordered_problems(results)
+        
+        for line in output.splitlines():
+            if not line.strip():
+                continue
+            
+            record = json.loads(line)
+            response = record.get("response") or {}
+            if record.get("error") or response.get("status_code") != 200:
+                print(f"Error analyzing {record['custom_id']}: {record.get('error') or response.get('body')}")
+                continue
+            
+            try:
+                custom_id = record["custom_id"]
+                choice = response["body"]["choices"][0]
+                content = choice["message"]["content"]
+                if content is None:
+                    # Refused or content-filtered requests come back without a body
+                    print(f"Error analyzing {custom_id}: empty response ({choice.get('finish_reason')})")
+                    continue
+                
+                results[custom_id] = self._parse_batch_response(content, batches[custom_id])
+                if self._is_cacheable(content, choice.get("finish_reason"), **requests[custom_id]):
+                    self._write_cache(cache_paths[custom_id], content)
+            except (KeyError, IndexError, AttributeError, TypeError, json.JSONDecodeError) as e:
+                print(f"Error parsing {record['custom_id']}: {e}")
+        
+        print(f"Batch job finished: {len(results)}/{len(cache_paths)} batches analyzed")
+        
+        return self._ordered_problems(results)
+    
+    def _report_batch_errors(self, errors: str):
+        """Print the custom_id and error of every request in a Batch API error file."""
+        failed = 0
+        for line in errors.splitlines():
+            if not line.strip():
+                continue
+            
+            record = json.loads(line)
+            response = record.get("response") or {}
+            error = record.get("error") or (response.get("body") or {}).get("error") or response
+            print(f"Error analyzing {record.get('custom_id')}: {error}")
+            failed += 1
+        
+        if failed:
+            print(f"{failed} batch requests failed")
+    
+    def _ordered_problems(self, results: Dict[str, List[Dict]]) -> List[Dict]:
+        """Flatten per-batch results, keeping the order of the input batches."""
+        all_problems = []
+        for custom_id in sorted(results, key=lambda c: int(c.split("-")[1])):
+            all_problems.extend(results[custom_id])
+        
+        return all_problems
+    
     def _summarize_problems(self, all_problems: List[Dict]) -> Dict:
         """Create final summary of all identified problems."""
         if not all_problems:
             return {"error": "No problems identified"}
         
-        problems_text = json.dumps(all_problems, indent=2)
+        # Send one entry per distinct problem with its post count, rather than
+        # every raw problem truncated to whatever fits
+        problems_text = json.dumps(self._aggregate_problems(all_problems), indent=2)
         
         prompt = """Given this list of recruitment problems identified from Reddit posts, create a comprehensive summary.
 
-Group similar problems together and rank them by frequency/severity.
+Each problem has a "count" of how many posts reported it. Group similar problems together and rank them by frequency/severity.
 
 Provide:
 1. Top 10 most common recruitment problems (ranked)
@@ -115,10 +495,10 @@ Provide:
 Problems list:
 {problems}
 
-Format as a structured JSON response with clear categories.""".format(problems=problems_text[:10000])
+Format as a structured JSON response with clear categories.""".format(problems=problems_text)
         
         try:
-            response = self.client.chat.completions.create(
+            content = self._cached_chat(
                 model="gpt-4o-mini",
                 messages=[
                     {"role": "system", "content": "You are an expert at synthesizing and summarizing recruitment industry problems."},
@@ -128,12 +508,59 @@ Format as a structured JSON response with clear categories.""".format(problems=p
                 response_format={"type": "json_object"}
             )
             
-            return json.loads(response.choices[0].message.content)
+            return json.loads(content)
             
         except Exception as e:
             print(f"Error creating final summary: {e}")
             return {"error": str(e)}
     
+    def _aggregate_problems(self, all_problems: List[Dict], top_n: int = 50,
+                            max_examples: int = 3) -> List[Dict]:
+        """
+        Collapse problems that share a normalized title into one entry.
+        
+        Args:
+            all_problems: Problems from every analyzed batch
+            top_n: Number of most frequently reported problems to keep
+            max_examples: Maximum example quotes kept per problem
+        
+        Returns:
+            List of {title, count, description, examples}, where count is the number
+            of distinct posts reporting the problem, most common first
+        """
+        post_ids = {}
+        grouped = {}
+        
+        for problem in all_problems:
+            title = str(problem.get('title') or '').strip()
+            if not title:
+                continue
+            
+            key = " ".join(re.sub(r"[^a-z0-9 ]+", " ", title.lower()).split())
+            # Count posts, not entries: a post may list the same problem twice. Problems
+            # the model attributed to no valid post number count as one post each
+            post_id = problem.get('post_id')
+            post_ids.setdefault(key, set()).add(post_id if post_id is not None else id(problem))
+            
+            entry = grouped.setdefault(key, {
+                'title': title,
+                'description': problem.get('description', ''),
+                'examples': []
+            })
+            examples = problem.get('examples') or []
+            if isinstance(examples, str):
+                examples = [examples]
+            for example in examples:
+                if len(entry['examples']) < max_examples and example not in entry['examples']:
+                    entry['examples'].append(example)
+        
+        counts = Counter({key: len(ids) for key, ids in post_ids.items()})
+        return [
+            {'title': grouped[key]['title'], 'count': count,
+             'description': grouped[key]['description'], 'examples': grouped[key]['examples']}
+            for key, count in counts.most_common(top_n)
+        ]
+    
     def generate_report(self, analysis: Dict, output_file: str = "recruitment_problems_report.json"):
         """Save analysis results to a JSON file."""
         with open(output_file, 'w', encoding='utf-8') as f:
@@ -0,0 +1,44 @@
+import asyncio
+import time
+
+
+class TokenBucket:
+    """
+    Async token bucket rate limiter.
+    
+    Allows bursts of up to `capacity` requests, then refills at `rate_per_sec`
+    tokens per second. Unlike a semaphore, this bounds the request *rate*, not
+    just how many requests are in flight.
+    """
+    
+    def __init__(self, rate_per_sec: float, capacity: float):
+        self.rate_per_sec = rate_per_sec
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+    
+    @classmethod
+    def per_minute(cls, requests_per_minute: float, capacity: float) -> "TokenBucket":
+        """Create a bucket from a requests-per-minute limit."""
+        return cls(requests_per_minute / 60, capacity)
+    
+    async def acquire(self):
+        """Wait until a token is available, then take it."""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate_per_sec)
+                self.updated = now
+                
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                
+                await asyncio.sleep((1 - self.tokens) / self.rate_per_sec)
+
+
+def log_retry(retry_state):
+    """tenacity before_sleep hook: report each retry and how long we back off."""
+    print(f"Retrying {retry_state.fn.__name__} in {retry_state.next_action.sleep:.1f}s "
+          f"after error: {retry_state.outcome.exception()}")
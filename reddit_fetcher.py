@@ -1,22 +1,101 @@
 import praw
+import prawcore
+import asyncio
+import aiohttp
+import orjson
+import pandas as pd
+import shelve
+import threading
+import time
+from collections import deque
+from contextlib import nullcontext
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta
+from pathlib import Path
 from typing import List, Dict, Optional
 from tqdm import tqdm
 import os
 from dotenv import load_dotenv
+from rate_limiter import TokenBucket, log_retry
+from tenacity import retry, wait_exponential_jitter, stop_after_attempt, retry_if_exception_type, retry_if_exception
 
 load_dotenv()
 
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# Comment bodies are cut to this many characters at fetch time. Analysis only
+# reads the first 200, so this keeps memory and --save-raw files bounded
+MAX_COMMENT_CHARS = 2000
+
+
+def _is_transient_http_error(exc: BaseException) -> bool:
+    """Whether an aiohttp error is worth retrying (rate limit, server error or network failure)."""
+    if isinstance(exc, aiohttp.ClientResponseError):
+        return exc.status in RETRY_STATUSES
+    return isinstance(exc, (aiohttp.ClientConnectionError, asyncio.TimeoutError))
+
+
+def _fill_created_dates(records: List[Dict]):
+    """Set 'created_date' (UTC ISO 8601) on each record from its 'created_utc' in one vectorized pass."""
+    if not records:
+        return
+    
+    timestamps = pd.Series([record['created_utc'] for record in records], dtype="float64")
+    dates = pd.to_datetime(timestamps, unit='s').dt.strftime('%Y-%m-%dT%H:%M:%S')
+    for record, date in zip(records, dates):
+        record['created_date'] = date
+
+
+# Back off and retry transient API failures instead of aborting the whole fetch
+praw_retry = retry(
+    wait=wait_exponential_jitter(1, 30),
+    stop=stop_after_attempt(6),
+    retry=retry_if_exception_type((prawcore.exceptions.ServerError,
+                                   prawcore.exceptions.TooManyRequests,
+                                   prawcore.exceptions.RequestException)),
+    before_sleep=log_retry,
+    reraise=True
+)
+
+http_retry = retry(
+    wait=wait_exponential_jitter(1, 30),
+    stop=stop_after_attempt(6),
+    retry=retry_if_exception(_is_transient_http_error),
+    before_sleep=log_retry,
+    reraise=True
+)
+
 
 class RedditFetcher:
-    def __init__(self):
-        self.reddit = praw.Reddit(
+    def __init__(self, cache_path: Optional[str] = ".cache/reddit.db", cache_ttl_hours: float = 24,
+                 max_comment_chars: Optional[int] = MAX_COMMENT_CHARS, max_workers: int = 8):
+        self.reddit = self._create_reddit()
+        self.subreddit = self.reddit.subreddit("recruitinghell")
+        self.max_comment_chars = max_comment_chars  # None keeps full comment bodies
+        # PRAW isn't thread-safe, so each comment-fetching thread gets its own instance
+        self.max_workers = max_workers
+        self._thread_local = threading.local()
+        # Comment threads keyed by submission id, so re-runs only fetch new posts
+        self.cache_path = cache_path
+        self.cache_ttl_seconds = cache_ttl_hours * 3600
+        if cache_path:
+            Path(cache_path).parent.mkdir(parents=True, exist_ok=True)
+    
+    def _create_reddit(self) -> praw.Reddit:
+        """Create a Reddit instance from the credentials in the environment."""
+        return praw.Reddit(
             client_id=os.getenv("REDDIT_CLIENT_ID"),
             client_secret=os.getenv("REDDIT_CLIENT_SECRET"),
             user_agent=os.getenv("REDDIT_USER_AGENT", "recruitment_hell_analyzer/1.0")
         )
-        self.subreddit = self.reddit.subreddit("recruitinghell")
     
+    def _thread_reddit(self) -> praw.Reddit:
+        """Return the calling thread's Reddit instance, creating it on first use."""
+        if not hasattr(self._thread_local, "reddit"):
+            self._thread_local.reddit = self._create_reddit()
+        return self._thread_local.reddit
+    
+    @praw_retry
     def fetch_posts(self, lookback_days: int = 30, limit: Optional[int] = None) -> List[Dict]:
         """
         Fetch posts from r/recruitinghell within the specified lookback period.
@@ -31,8 +110,9 @@ class RedditFetcher:
         posts = []
         cutoff_timestamp = (datetime.now() - timedelta(days=lookback_days)).timestamp()
         
-        # Fetch posts using the 'new' sorting to get chronological order
-        submission_generator = self.subreddit.new(limit=None)
+        # Fetch posts using the 'new' sorting to get chronological order. Passing the
+        # limit lets PRAW size its last page request instead of always asking for 100
+        submission_generator = self.subreddit.new(limit=limit)
         
         print(f"Fetching posts from the last {lookback_days} days...")
         
@@ -47,6 +127,7 @@ class RedditFetcher:
             
             posts.append(self._extract_post_data(submission))
         
+        _fill_created_dates(posts)
         print(f"Fetched {len(posts)} posts")
         return posts
     
@@ -55,9 +136,10 @@ class RedditFetcher:
         return {
             'id': submission.id,
             'title': submission.title,
-            'author': str(submission.author) if submission.author else '[deleted]',
+            # .name is already loaded; str() on a Redditor can trigger a profile fetch
+            'author': submission.author.name if submission.author is not None else '[deleted]',
             'created_utc': submission.created_utc,
-            'created_date': datetime.fromtimestamp(submission.created_utc).isoformat(),
+            'created_date': None,  # Filled in bulk by _fill_created_dates
             'score': submission.score,
             'num_comments': submission.num_comments,
             'selftext': submission.selftext,
@@ -78,39 +160,101 @@ class RedditFetcher:
         Returns:
             Updated posts with comments included
         """
-        print(f"Fetching comments for {len(posts)} posts...")
+        cached = self._load_cached_comments(posts, max_comments_per_post)
+        to_fetch = [post for post in posts if post['id'] not in cached]
+        for post in posts:
+            if post['id'] in cached:
+                post['comments'] = cached[post['id']]
         
-        for post in tqdm(posts, desc="Fetching comments"):
-            submission = self.reddit.submission(id=post['id'])
-            submission.comments.replace_more(limit=0)  # Remove MoreComments objects
-            
-            comments = []
-            comment_count = 0
-            
-            for comment in submission.comments.list():
-                if comment_count >= max_comments_per_post:
-                    break
+        print(f"Fetching comments for {len(to_fetch)} posts ({len(cached)} cached)...")
+        
+        failed = []
+        
+        # Overlap the per-post HTTP waits; each thread's PRAW instance still follows
+        # Reddit's rate-limit headers, which track the quota shared by all of them
+        with self._open_cache() as cache, ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {executor.submit(self._fetch_comments_for, post, max_comments_per_post): post
+                       for post in to_fetch}
+            for future in tqdm(as_completed(futures), total=len(futures), desc="Fetching comments"):
+                post = futures[future]
+                try:
+                    post['comments'] = future.result()
+                except Exception as e:
+                    # Retries are exhausted; keep going so the other threads still get cached
+                    print(f"Error fetching comments for post {post['id']}: {e}")
+                    post['comments'] = []
+                    failed.append(post['id'])
+                    continue
                 
-                if hasattr(comment, 'body') and comment.body != '[deleted]':
-                    comments.append({
-                        'id': comment.id,
-                        'author': str(comment.author) if comment.author else '[deleted]',
-                        'body': comment.body,
-                        'score': comment.score,
-                        'created_utc': comment.created_utc,
-                        'created_date': datetime.fromtimestamp(comment.created_utc).isoformat(),
-                        'parent_id': comment.parent_id,
-                        'is_submitter': comment.is_submitter
-                    })
-                    comment_count += 1
-            
-            post['comments'] = comments
+                # Store each thread as it arrives so a later failure can't lose it
+                _fill_created_dates(post['comments'])
+                if cache is not None:
+                    key = self._comments_cache_key(post['id'], max_comments_per_post)
+                    cache[key] = {'fetched_at': time.time(), 'comments': post['comments']}
+        
+        if failed:
+            print(f"Could not fetch comments for {len(failed)} posts; they will be retried on the next run")
         
         total_comments = sum(len(post['comments']) for post in posts)
         print(f"Fetched {total_comments} comments total")
         
         return posts
     
+    def _comments_cache_key(self, post_id: str, max_comments_per_post: int) -> str:
+        """Cache key for a post's comments; different comment and body limits are cached separately."""
+        return f"{post_id}:c{max_comments_per_post}:b{self.max_comment_chars}"
+    
+    def _load_cached_comments(self, posts: List[Dict], max_comments_per_post: int) -> Dict[str, List[Dict]]:
+        """Return cached comment lists by post id, skipping entries older than the TTL."""
+        if not self.cache_path:
+            return {}
+        
+        cached = {}
+        now = time.time()
+        with shelve.open(self.cache_path) as cache:
+            for post in posts:
+                entry = cache.get(self._comments_cache_key(post['id'], max_comments_per_post))
+                if entry and now - entry['fetched_at'] < self.cache_ttl_seconds:
+                    cached[post['id']] = entry['comments']
+        
+        return cached
+    
+    def _open_cache(self):
+        """Open the comment cache for writing, or a no-op context if caching is disabled."""
+        if not self.cache_path:
+            return nullcontext()
+        return shelve.open(self.cache_path)
+    
+    @praw_retry
+    def _fetch_comments_for(self, post: Dict, max_comments_per_post: int) -> List[Dict]:
+        """Fetch up to max_comments_per_post comments for a single post. Runs in a worker thread."""
+        # Lazy: the only request is the comments fetch triggered by replace_more()
+        submission = self._thread_reddit().submission(id=post['id'])
+        submission.comments.replace_more(limit=0)  # Remove MoreComments objects
+        
+        comments = []
+        
+        for comment in submission.comments.list():
+            if len(comments) >= max_comments_per_post:
+                break
+            
+            # isinstance avoids hasattr(), which makes PRAW lazy-load missing attributes
+            if not isinstance(comment, praw.models.Comment) or comment.body == '[deleted]':
+                continue
+            
+            comments.append({
+                'id': comment.id,
+                'author': comment.author.name if comment.author is not None else '[deleted]',
+                'body': comment.body[:self.max_comment_chars],
+                'score': comment.score,
+                'created_utc': comment.created_utc,
+                'created_date': None,  # Filled in bulk by _fill_created_dates
+                'parent_id': comment.parent_id,
+                'is_submitter': comment.is_submitter
+            })
+        
+        return comments
+    
     def fetch_all_content(self, lookback_days: int = 30, post_limit: Optional[int] = None,
                          max_comments_per_post: int = 100) -> List[Dict]:
         """
@@ -127,4 +271,205 @@ class RedditFetcher:
         posts = self.fetch_posts(lookback_days, post_limit)
         if posts:
             posts = self.fetch_comments(posts, max_comments_per_post)
-        return posts
\ No newline at end of file
+        return posts
+
+
+class AsyncRedditFetcher:
+    """
+    Fetches the same data as RedditFetcher, but talks to Reddit's OAuth JSON API
+    directly with aiohttp so comment threads can be fetched concurrently.
+    """
+    TOKEN_URL = "https://www.reddit.com/api/v1/access_token"
+    API_URL = "https://oauth.reddit.com"
+    
+    def __init__(self, max_concurrency: int = 8, requests_per_minute: int = 60,
+                 max_comment_chars: Optional[int] = MAX_COMMENT_CHARS):
+        self.client_id = os.getenv("REDDIT_CLIENT_ID")
+        self.client_secret = os.getenv("REDDIT_CLIENT_SECRET")
+        self.user_agent = os.getenv("REDDIT_USER_AGENT", "recruitment_hell_analyzer/1.0")
+        self.max_concurrency = max_concurrency
+        self.requests_per_minute = requests_per_minute
+        self.max_comment_chars = max_comment_chars  # None keeps full comment bodies
+        self._auth_headers = {}
+        self._token_expires_at = 0.0
+        self._auth_lock = None
+        self._rate_limiter = None
+    
+    def fetch_all_content(self, lookback_days: int = 30, post_limit: Optional[int] = None,
+                         max_comments_per_post: int = 100) -> List[Dict]:
+        """
+        Fetch both posts and their comments in one call.
+        
+        Args:
+            lookback_days: Number of days to look back
+            post_limit: Maximum number of posts to fetch
+            max_comments_per_post: Maximum comments per post
+        
+        Returns:
+            List of posts with comments included, in the same shape as RedditFetcher
+        """
+        return asyncio.run(self._fetch_all_content(lookback_days, post_limit, max_comments_per_post))
+    
+    async def _fetch_all_content(self, lookback_days: int, post_limit: Optional[int],
+                                 max_comments_per_post: int) -> List[Dict]:
+        """Share one keep-alive session across authentication, listing and comment calls."""
+        self._rate_limiter = TokenBucket.per_minute(self.requests_per_minute, capacity=self.max_concurrency)
+        self._auth_lock = asyncio.Lock()
+        connector = aiohttp.TCPConnector(limit=16)
+        async with aiohttp.ClientSession(headers={"User-Agent": self.user_agent}, connector=connector) as session:
+            await self._ensure_token(session)
+            posts = await self._fetch_posts(session, lookback_days, post_limit)
+            if posts:
+                posts = await self._fetch_comments(session, posts, max_comments_per_post)
+        return posts
+    
+    @http_retry
+    async def _authenticate(self, session: aiohttp.ClientSession):
+        """Get an application-only OAuth token for the API requests."""
+        auth = aiohttp.BasicAuth(self.client_id, self.client_secret)
+        await self._rate_limiter.acquire()
+        async with session.post(self.TOKEN_URL, auth=auth, data={"grant_type": "client_credentials"}) as resp:
+            resp.raise_for_status()
+            token = orjson.loads(await resp.read())
+        
+        self._auth_headers = {"Authorization": f"bearer {token['access_token']}"}
+        self._token_expires_at = time.monotonic() + token.get("expires_in", 3600)
+    
+    async def _ensure_token(self, session: aiohttp.ClientSession, rejected_headers: Optional[Dict] = None):
+        """
+        Authenticate if there is no token, it is about to expire, or the API rejected it.
+        
+        rejected_headers are the headers a request got a 401 with; the token is only
+        replaced if it is still that one, so concurrent 401s trigger a single refresh.
+        """
+        async with self._auth_lock:
+            expiring = time.monotonic() > self._token_expires_at - 60
+            if expiring or (rejected_headers is not None and rejected_headers is self._auth_headers):
+                await self._authenticate(session)
+    
+    @http_retry
+    async def _get_json(self, session: aiohttp.ClientSession, path: str, params: Dict):
+        """GET an OAuth API endpoint and decode the JSON body."""
+        params = {"raw_json": 1, **params}  # Don't HTML-escape text fields
+        
+        for attempt in range(2):
+            await self._ensure_token(session)
+            headers = self._auth_headers
+            await self._rate_limiter.acquire()
+            async with session.get(f"{self.API_URL}{path}", params=params, headers=headers) as resp:
+                if resp.status != 401 or attempt > 0:
+                    resp.raise_for_status()
+                    return orjson.loads(await resp.read())
+            
+            # The token was revoked or expired early; refresh it once and retry
+            await self._ensure_token(session, rejected_headers=headers)
+    
+    async def _fetch_posts(self, session: aiohttp.ClientSession, lookback_days: int,
+                           limit: Optional[int]) -> List[Dict]:
+        """Walk the 'new' listing page by page until the lookback cutoff or limit is hit."""
+        posts = []
+        cutoff_timestamp = (datetime.now() - timedelta(days=lookback_days)).timestamp()
+        after = None
+        
+        print(f"Fetching posts from the last {lookback_days} days...")
+        
+        with tqdm(desc="Fetching posts") as progress:
+            while True:
+                params = {"limit": min(100, limit - len(posts)) if limit else 100}
+                if after:
+                    params["after"] = after
+                listing = await self._get_json(session, "/r/recruitinghell/new", params)
+                
+                for child in listing["data"]["children"]:
+                    data = child["data"]
+                    if data["created_utc"] < cutoff_timestamp or (limit and len(posts) >= limit):
+                        after = None
+                        break
+                    
+                    posts.append(self._extract_post_data(data))
+                    progress.update(1)
+                else:
+                    after = listing["data"]["after"]
+                
+                if not after or (limit and len(posts) >= limit):
+                    break
+        
+        _fill_created_dates(posts)
+        print(f"Fetched {len(posts)} posts")
+        return posts
+    
+    def _extract_post_data(self, data: Dict) -> Dict:
+        """Extract relevant data from a submission's JSON, matching RedditFetcher's fields."""
+        return {
+            'id': data['id'],
+            'title': data['title'],
+            'author': data.get('author') or '[deleted]',
+            'created_utc': data['created_utc'],
+            'created_date': None,  # Filled in bulk by _fill_created_dates
+            'score': data['score'],
+            'num_comments': data['num_comments'],
+            'selftext': data['selftext'],
+            'url': data['url'],
+            'permalink': f"https://reddit.com{data['permalink']}",
+            'is_self': data['is_self'],
+            'comments': []
+        }
+    
+    async def _fetch_comments(self, session: aiohttp.ClientSession, posts: List[Dict],
+                              max_comments_per_post: int) -> List[Dict]:
+        """Fetch every post's comment thread concurrently, at most max_concurrency at a time."""
+        print(f"Fetching comments for {len(posts)} posts...")
+        sem = asyncio.Semaphore(self.max_concurrency)
+        failed = []
+        
+        with tqdm(total=len(posts), desc="Fetching comments") as progress:
+            async def _bounded(post: Dict):
+                try:
+                    async with sem:
+                        thread = await self._get_json(session, f"/comments/{post['id']}", {"limit": max_comments_per_post})
+                    post['comments'] = self._extract_comments(thread, max_comments_per_post)
+                except Exception as e:
+                    # Retries are exhausted or the post is gone; don't lose the other threads
+                    print(f"Error fetching comments for post {post['id']}: {e}")
+                    post['comments'] = []
+                    failed.append(post['id'])
+                progress.update(1)
+            
+            await asyncio.gather(*[_bounded(post) for post in posts])
+        
+        if failed:
+            print(f"Could not fetch comments for {len(failed)} posts")
+        
+        _fill_created_dates([comment for post in posts for comment in post['comments']])
+        total_comments = sum(len(post['comments']) for post in posts)
+        print(f"Fetched {total_comments} comments total")
+        
+        return posts
+    
+    def _extract_comments(self, thread: List[Dict], max_comments_per_post: int) -> List[Dict]:
+        """Flatten a comment thread breadth-first, like PRAW's comments.list()."""
+        comments = []
+        queue = deque(thread[1]["data"]["children"])
+        
+        while queue and len(comments) < max_comments_per_post:
+            child = queue.popleft()
+            if child["kind"] != "t1":  # Skip "load more comments" stubs
+                continue
+            
+            data = child["data"]
+            if data["replies"]:
+                queue.extend(data["replies"]["data"]["children"])
+            
+            if data["body"] != '[deleted]':
+                comments.append({
+                    'id': data['id'],
+                    'author': data.get('author') or '[deleted]',
+                    'body': data['body'][:self.max_comment_chars],
+                    'score': data['score'],
+                    'created_utc': data['created_utc'],
+                    'created_date': None,  # Filled in bulk by _fill_created_dates
+                    'parent_id': data['parent_id'],
+                    'is_submitter': data['is_submitter']
+                })
+        
+        return comments